@@ -0,0 +1,39 @@
+"""facts.py -- Bulk loading a million facts from CSV into Figaro memory
+
+Run from the repository root:
+
+    python benchmarks/facts.py
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from figaro import Figaro
+
+FACTS = 1000000
+
+if __name__ == '__main__':
+    facts_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(facts_dir, 'facts.csv')
+        with open(path, 'w') as facts_fp:
+            for ix in range(FACTS):
+                facts_fp.write('Place%d,in region %d\n' % (ix, ix % 50))
+
+        fg = Figaro()
+        load_time = timeit.timeit(lambda: fg.learn_file(path), number=1)
+        assert fg.hears("Where is place999999?") == 'in region 49'
+        turn_time = timeit.timeit(lambda: fg.hears("Where is place5?"), number=100) / 100
+
+        print('facts:     %d' % FACTS)
+        print('load:      %6.2f s' % load_time)
+        print('next turn: %6.1f us' % (1e6 * turn_time))
+    finally:
+        shutil.rmtree(facts_dir)
@@ -0,0 +1,44 @@
+"""opcache.py -- Operator memo tables on a repeated-operand workload
+
+Run from the repository root:
+
+    python benchmarks/opcache.py
+
+Reports the cost per call with the cache off and on, for the built-in
+sqrt and for a deliberately slow operator, over a small set of operands
+that repeat the way polling dashboards repeat them.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+from math import sqrt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from figaro.opcache import OperatorCache
+
+CALLS = 100000
+OPERANDS = [float(ix) for ix in range(64)]
+
+def slow_sqrt(x):
+    """Stand-in for an operator costing about 20 microseconds"""
+    for _ in range(1000):
+        pass
+    return sqrt(x)
+
+def run(cache, func):
+    call = cache.call
+    for ix in range(CALLS):
+        call(func, OPERANDS[ix % len(OPERANDS)])
+
+if __name__ == '__main__':
+    for func in (sqrt, slow_sqrt):
+        timings = {}
+        for enabled in (False, True):
+            cache = OperatorCache(enabled=enabled)
+            timings[enabled] = min(timeit.repeat(lambda: run(cache, func), number=1, repeat=3))
+            print('%-9s cache=%-5s %6.2f us/call' % (func.__name__, enabled, 1e6 * timings[enabled] / CALLS))
+        print('%-9s speedup: %.2fx' % (func.__name__, timings[False] / timings[True]))
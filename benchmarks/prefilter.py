@@ -0,0 +1,58 @@
+"""prefilter.py -- Dispatch cost on rejection-heavy traffic with many handlers
+
+Run from the repository root:
+
+    python benchmarks/prefilter.py
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from figaro import Figaro
+from figaro.handlerbase import StatementHandlerBase
+from figaro.response import Response
+
+EXTRA_HANDLERS = 50
+TURNS = 2000
+
+class KeywordHandler(StatementHandlerBase):
+    """Synthetic handler that answers a single keyword"""
+    def __init__(self, keyword):
+        self._keyword = keyword
+        self.PREFILTER = (keyword,)
+
+    def can_handle(self, statement, memory=None):
+        return self._keyword in statement.lower()
+
+    def handle(self, statement, memory=None):
+        return Response(self._keyword, [])
+
+def build(use_prefilter):
+    fg = Figaro(use_prefilter=use_prefilter)
+    for ix in range(EXTRA_HANDLERS):
+        fg.register_handler(KeywordHandler('zq%dkeyword' % ix))
+    for ix in range(20):
+        fg.hears('fact%d is value number %d' % (ix, ix))
+    return fg
+
+STATEMENTS = ['jibberjabber and more jibberjabber',
+              'nothing interesting to say today',
+              'i would rather not talk about that',
+              'the quick brown fox jumps over the lazy dog']
+
+def run(fg):
+    for ix in range(TURNS):
+        fg.hears(STATEMENTS[ix % len(STATEMENTS)])
+
+if __name__ == '__main__':
+    timings = {}
+    for use_prefilter in (False, True):
+        fg = build(use_prefilter)
+        timings[use_prefilter] = min(timeit.repeat(lambda: run(fg), number=1, repeat=3))
+        print('prefilter=%-5s %8.1f us/turn' % (use_prefilter, 1e6 * timings[use_prefilter] / TURNS))
+    print('speedup: %.1fx' % (timings[False] / timings[True]))
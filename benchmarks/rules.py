@@ -0,0 +1,63 @@
+"""rules.py -- Startup cost of a 50k-rule file, compiled versus cached
+
+Also times a new session: a cached load plus registering the handler
+with a fresh Figaro.
+
+Run from the repository root:
+
+    python benchmarks/rules.py
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from figaro import Figaro, RuleHandler
+from figaro.rules import RuleSet
+
+RULES = 50000
+
+def write_rules(path):
+    rules = []
+    for ix in range(RULES):
+        if ix % 2:
+            rules.append({'keyword': 'kw%dword' % ix, 'answer': 'Keyword %d.' % ix})
+        else:
+            rules.append({'pattern': 'w%d {topic} *' % ix, 'answer': 'Pattern %d.' % ix})
+    with open(path, 'w') as rules_fp:
+        json.dump({'name': 'bench', 'rules': rules}, rules_fp)
+
+if __name__ == '__main__':
+    rules_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(rules_dir, 'rules.json')
+        write_rules(path)
+        cache_path = path + '.compiled'
+
+        compile_time = timeit.timeit(lambda: RuleSet.load(path), number=1)
+        cached_time = min(timeit.repeat(lambda: RuleSet.load(path), number=1, repeat=5))
+        def new_session():
+            fg = Figaro()
+            fg.register_handler(RuleHandler.from_file(path))
+            return fg
+        session_time = min(timeit.repeat(new_session, number=1, repeat=5))
+        assert new_session().hears('say kw49999word now') == 'Keyword 49999.'
+
+        ruleset = RuleSet.load(path)
+        assert ruleset.match('w4 apples and pears') == ('Pattern 4.', 'apples')
+        assert ruleset.match('say kw49999word now') == ('Keyword 49999.', None)
+
+        print('rules:    %d' % len(ruleset))
+        print('compile:  %7.1f ms' % (1e3 * compile_time))
+        print('cached:   %7.1f ms' % (1e3 * cached_time))
+        print('session:  %7.1f ms' % (1e3 * session_time))
+        print('artifact: %7.1f MB' % (os.path.getsize(cache_path) / 1e6))
+    finally:
+        shutil.rmtree(rules_dir)
@@ -1,4 +1,8 @@
 from .agent import Figaro
+from .memory import KnowledgeBase
+from . import pipeline
+from .profiler import TurnProfiler
 
 from .handlers.arithmetichandler import ArithmeticHandler
 from .handlers.elizastatementhandler import ElizaStatementHandler
+from .handlers.rulehandler import RuleHandler
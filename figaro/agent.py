@@ -15,6 +15,12 @@
    limitations under the License.
 """
 from copy import deepcopy
+from contextlib import contextmanager
+
+try:
+    from time import perf_counter as _clock
+except ImportError:
+    from time import time as _clock
 
 from .handlers.greetingstatementhandler import GreetingStatementHandler
 from .handlers.arithmetichandler import ArithmeticHandler
@@ -23,12 +29,32 @@ from .handlers.declarationhandler import DeclarationHandler
 from .handlers.convoterminationhandler import ConvoTerminationHandler
 from .handlers.elizastatementhandler import ElizaStatementHandler
 from .handlerbase import DefaultStatementHandler
+from .prefilter import HandlerPrefilter
+from .memory import LayeredMemory
+from . import pipeline
+from . import facts
+from .profiler import NULL_PROFILER, TurnProfiler
 
 class Figaro(object):
-    """Figaro -- the personal assistant"""
-    def __init__(self):
+    """Figaro -- the personal assistant
+
+    turn_budget bounds, in seconds, the time spent looking for a handler.
+    It is checked before each candidate handler after the first; when it
+    has run out the turn falls back to DefaultStatementHandler. A handler
+    that accepts is always used, even if it ran over. A single handler
+    call is not interrupted, so pair it with max_input_length to bound
+    how much text each handler has to scan.
+    """
+    def __init__(self, use_prefilter=True, knowledge=None, profiler=None,
+                 turn_budget=None, max_input_length=None):
         self._conv_ended = False
-        self._memory = {}
+        self._turn_budget = turn_budget
+        self._max_input_length = max_input_length
+        self._deadlines_exceeded = {}
+        self._profiler = NULL_PROFILER if profiler is None else profiler
+        self._use_prefilter = use_prefilter
+        self._prefilter = None
+        self._memory = LayeredMemory(knowledge)
         self._handlers = []
         self._handlers.append(GreetingStatementHandler())
         self._handlers.append(ArithmeticHandler())
@@ -37,21 +63,147 @@ class Figaro(object):
         self._handlers.append(ConvoTerminationHandler())
         self._handlers.append(ElizaStatementHandler())
         self._handlers.append(DefaultStatementHandler())
+        self._compile_prefilter()
+        self._stages = list(pipeline.DEFAULT_STAGES)
 
     @property
     def conversation_ended(self):
         return self._conv_ended
 
+    @property
+    def max_input_length(self):
+        """Statements are cut to this many characters, or None"""
+        return self._max_input_length
+
+    @property
+    def deadlines_exceeded(self):
+        """Count of turns that ran out of budget, by the last handler that ran
+
+        >>> fg = Figaro(turn_budget=0)
+        >>> fg.hears("5 minus 13")
+        '-8.0'
+        >>> fg.hears("hey they said")
+        "I'm not sure how to respond to that."
+        >>> fg.deadlines_exceeded
+        {'GreetingStatementHandler': 1}
+        """
+        return dict(self._deadlines_exceeded)
+
+    @property
+    def profiler(self):
+        """The profiler timing each turn; a no-op unless one was given"""
+        return self._profiler
+
+    @contextmanager
+    def profiling(self, sample_rate=1.0, max_turns=1000):
+        """Profile the turns heard inside a with block
+
+        >>> fg = Figaro()
+        >>> with fg.profiling() as prof:
+        ...     fg.hears("hey")
+        'Hey there.'
+        >>> 'turn;GreetingStatementHandler.handle' in prof.collapsed()
+        True
+        """
+        previous = self._profiler
+        self._profiler = TurnProfiler(sample_rate, max_turns)
+        try:
+            yield self._profiler
+        finally:
+            self._profiler = previous
+
+    @property
+    def stages(self):
+        """The pipeline stages every statement flows through
+
+        The list may be edited in place, e.g. to insert a post-processing
+        stage ahead of pipeline.commit.
+        """
+        return self._stages
+
     def _mem_store(self, key, val):
         self._memory[key] = val
 
-    def _dispatch_to_handler(self, statement):
-        for handler in self._handlers:
-            copied_mem = deepcopy(self._memory)
-            if handler.can_handle(statement, copied_mem):
-                return handler.handle(statement, copied_mem)
+    def learn(self, declared):
+        """Memorize (subject, value) facts as if each was declared
+
+        Keys are normalized like DeclarationHandler, but no handlers run.
+        All facts are read before any is stored, so if reading fails,
+        memory is left unchanged.
+
+        >>> fg = Figaro()
+        >>> fg.learn([('Alabama', 'in America.'), ('My name', 'Ishmael')])
+        >>> fg.hears("Where is alabama?")
+        'in America.'
+        >>> fg.hears("who am I?")
+        'You told me your name is Ishmael.'
+        """
+        memos = dict(facts.declared_memos(declared))
+        self._memory.update(memos.items())
+
+    def learn_file(self, path):
+        """Memorize the facts in a .csv or .jsonl file, see figaro.facts"""
+        self.learn(facts.read_facts(path))
+
+    def _compile_prefilter(self):
+        if self._use_prefilter:
+            self._prefilter = HandlerPrefilter(self._handlers)
+
+    def register_handler(self, handler):
+        """Add a handler ahead of the fallback DefaultStatementHandler"""
+        self._handlers.insert(len(self._handlers) - 1, handler)
+        self._compile_prefilter()
+
+    def _deadline(self):
+        if self._turn_budget is None:
+            return None
+        return _clock() + self._turn_budget
+
+    def _route(self, statement, deadline=None):
+        profiler = self._profiler
+        candidates = -1
+        if self._prefilter is not None:
+            with profiler.span('prefilter'):
+                candidates = self._prefilter.candidates(statement)
+        fallback = self._handlers[-1]
+        last_run = None
+        for ix, handler in enumerate(self._handlers):
+            if not candidates >> ix & 1:
+                continue
+            if deadline is not None and last_run is not None \
+                    and handler is not fallback and _clock() > deadline:
+                name = last_run.__class__.__name__
+                self._deadlines_exceeded[name] = self._deadlines_exceeded.get(name, 0) + 1
+                return fallback, deepcopy(self._memory)
+            with profiler.span('snapshot'):
+                copied_mem = deepcopy(self._memory)
+            with profiler.span(handler.__class__.__name__ + '.can_handle'):
+                accepted = handler.can_handle(statement, copied_mem)
+            last_run = handler
+            if accepted:
+                return handler, copied_mem
         raise RuntimeError('No handler registered for statement "%s"' % statement)
 
+    def _commit(self, response):
+        if response.terminated:
+            self._conv_ended = True
+
+        for memo in response.memo:
+            key, val = memo
+            self._mem_store(key, val)
+
+    def converse(self, statements):
+        """Stream statements through the pipeline, yielding a Turn for each
+
+        >>> fg = Figaro()
+        >>> def shout(turn):
+        ...     turn.answer = turn.answer.upper()
+        >>> fg.stages.insert(-1, pipeline.per_turn(shout))
+        >>> [(t.handler.__class__.__name__, t.answer) for t in fg.converse(["hey", "3 times 4"])]
+        [('GreetingStatementHandler', 'HEY THERE.'), ('ArithmeticHandler', '12.0')]
+        """
+        return pipeline.run(self, statements, self._stages)
+
     def hears(self, statement):
         """Accept the given statement and respond to it
 
@@ -87,18 +239,8 @@ class Figaro(object):
         >>> fg.hears("who am I?")
         'You told me your name is Ishmael.'
         """
-        response = self._dispatch_to_handler(statement)
-
-        if response.terminated:
-            self._conv_ended = True
-
-        answer, memos = response.answer, response.memo
-
-        for memo in memos:
-            key, val = memo
-            self._mem_store(key, val)
-
-        return answer
+        for turn in self.converse([statement]):
+            return turn.answer
 
 if __name__ == '__main__':
     import doctest
@@ -0,0 +1,96 @@
+"""facts.py -- reading facts in bulk from CSV and JSON Lines exports
+
+   Copyright 2016 Rylan Santinon
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+   A fact is a (subject, value) pair, read as "subject is value". CSV
+   files hold one fact per row in exactly two columns; a first row of
+   "subject,value" is taken as a header and skipped, any other first
+   row is a fact. JSON Lines files hold one {"subject": ..., "value": ...}
+   object per line. Both are read as UTF-8.
+"""
+import io
+import sys
+import csv
+import json
+
+from .handlers.declarationhandler import DeclarationHandler
+
+HEADER = ['subject', 'value']
+
+try:
+    _STRING_TYPES = basestring
+except NameError: # Python 3
+    _STRING_TYPES = str
+
+def _open_csv(path):
+    """Yield rows of text cells; the Python 2 csv module only reads bytes"""
+    if sys.version_info[0] < 3:
+        with open(path, 'rb') as facts_fp:
+            for row in csv.reader(facts_fp):
+                yield [cell.decode('utf-8') for cell in row]
+    else:
+        with io.open(path, 'r', encoding='utf-8', newline='') as facts_fp:
+            for row in csv.reader(facts_fp):
+                yield row
+
+def _read_csv(path):
+    for line_num, row in enumerate(_open_csv(path), 1):
+        if not row:
+            continue
+        if len(row) != 2:
+            raise ValueError("%s:%d: expected 2 columns (subject, value), got %d"
+                             % (path, line_num, len(row)))
+        if line_num == 1 and [cell.strip().lower() for cell in row] == HEADER:
+            continue
+        yield row[0], row[1]
+
+def _read_jsonl(path):
+    with io.open(path, 'r', encoding='utf-8') as facts_fp:
+        for line_num, line in enumerate(facts_fp, 1):
+            if not line.strip():
+                continue
+            fact = json.loads(line)
+            try:
+                subject, value = fact['subject'], fact['value']
+            except (KeyError, TypeError):
+                subject = value = None
+            if not isinstance(subject, _STRING_TYPES) or not isinstance(value, _STRING_TYPES):
+                raise ValueError('%s:%d: expected an object with string "subject" and "value"'
+                                 % (path, line_num))
+            yield subject, value
+
+READERS = {'.csv': _read_csv, '.jsonl': _read_jsonl}
+
+def read_facts(path):
+    """Stream (subject, value) pairs from a .csv or .jsonl file"""
+    for ext, reader in READERS.items():
+        if path.lower().endswith(ext):
+            return reader(path)
+    raise ValueError("Unknown fact file format: %s" % path)
+
+def declared_memos(facts):
+    """Stream the memory entries DeclarationHandler would store for facts
+
+    >>> list(declared_memos([('Alabama', 'in America.'), ('my name', 'Ada')]))
+    [('alabama', 'in America.'), ('my name', 'Ada'), ('_interlocutor_name', 'Ada')]
+    """
+    memos = DeclarationHandler.memos
+    for subject, value in facts:
+        for memo in memos(subject, value):
+            yield memo
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
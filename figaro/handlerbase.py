@@ -19,7 +19,19 @@ from .response import Response
 from .memorykeys import MemoryKeys
 
 class StatementHandlerBase(object):
-    """Abstract base class for handling general statements."""
+    """Abstract base class for handling general statements.
+
+    Subclasses may set PREFILTER to a sequence of lowercase keywords. A
+    handler is only asked can_handle when at least one of its keywords
+    occurs in the lowercased statement, so the keywords must cover every
+    statement the handler accepts. None means always ask.
+
+    PREFILTER may instead be a callable taking the lowercased statement,
+    for handlers with their own precompiled index (see RuleHandler). The
+    handler is only asked can_handle when it returns true, so it must
+    return true for every statement the handler accepts.
+    """
+    PREFILTER = None
 
     @abstractmethod
     def can_handle(self, statement, memory):
@@ -18,11 +18,69 @@ from __future__ import division
 
 from ..response import Response
 from ..handlerbase import StatementHandlerBase
+from ..opcache import OperatorCache
 
+import re
+import sys
+from collections import namedtuple
 from math import log, log10, sqrt, sin, cos, tan
 
+try:
+    _unichr = unichr
+except NameError: # Python 3
+    _unichr = chr
+
+def _float_accepts(token):
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+# Code points that some Python version counts as whitespace. Which of
+# them float() strips depends on the version and on the string type,
+# so each is tried on float() below.
+_WHITESPACE = [0x09, 0x0a, 0x0b, 0x0c, 0x0d, 0x1c, 0x1d, 0x1e, 0x1f, 0x20,
+               0x85, 0xa0, 0x1680, 0x180e, 0x2000, 0x2001, 0x2002, 0x2003,
+               0x2004, 0x2005, 0x2006, 0x2007, 0x2008, 0x2009, 0x200a,
+               0x200b, 0x2028, 0x2029, 0x202f, 0x205f, 0x3000, 0xfeff]
+
+# float() takes underscores between digits only from Python 3.6.
+_DIGITS = r'\d(?:_?\d)*' if _float_accepts('1_0') else r'\d+'
+
+def _number_pattern(char, limit):
+    """Compile the float() syntax for strings whose characters are char(code)"""
+    space = ''.join(re.escape(char(code)) for code in _WHITESPACE
+                    if code < limit and _float_accepts(char(code) + '5'))
+    return re.compile(r'''%(s)s[+-]?(?:
+                           (?:%(d)s(?:\.(?:%(d)s)?)?|\.%(d)s)(?:e[+-]?%(d)s)?
+                           |inf(?:inity)?
+                           |nan
+                         )%(s)s\Z''' % {'d': _DIGITS, 's': '[%s]*' % space},
+                      re.IGNORECASE | re.VERBOSE | re.UNICODE)
+
+_NUMBER = _number_pattern(_unichr, sys.maxunicode + 1)
+# Python 2 byte strings: float() strips only ASCII whitespace from them.
+_BYTES_NUMBER = _number_pattern(chr, 256) if bytes is str else _NUMBER
+
+def is_number(token):
+    """Return true if float() accepts token, without calling it
+
+    >>> [is_number(t) for t in ['5', '-2.5e3', '.5', 'Inf', '-nan', '5.5.5', 'e5', '', '\x1c5']]
+    [True, True, True, True, True, False, False, False, False]
+    """
+    pattern = _BYTES_NUMBER if isinstance(token, bytes) else _NUMBER
+    return pattern.match(token) is not None
+
+_Scan = namedtuple('_Scan', 'numbers infix unary')
+
 class ArithmeticHandler(StatementHandlerBase):
-    """Class for basic arithmetic responses"""
+    """Class for basic arithmetic responses
+
+    Operator results can be memoized process-wide in CACHE by setting
+    ArithmeticHandler.CACHE.enabled = True. It is off by default since
+    the built-in operators are cheaper than a cache lookup.
+    """
     _ADD = lambda x, y: sum([x, y])
     _SUBTRACT = lambda x, y: sum([x, -1*y])
     _PRODUCT = lambda x, y: x*y
@@ -45,18 +103,50 @@ class ArithmeticHandler(StatementHandlerBase):
                  ('ln', log),
                  ('log', log10)]
 
+    PREFILTER = tuple(op for op, _ in INFIX_OPS + UNARY_OPS)
+
+    CACHE = OperatorCache(enabled=False)
+
+    _INFIX = dict(INFIX_OPS)
+    _UNARY = dict(UNARY_OPS)
+
+    def __init__(self):
+        self._last_scan = (None, None)
+
+    def _scan(self, statement):
+        """Find number and operator positions among the tokens of statement
+
+        The scan of the most recent statement is kept, so can_handle and
+        handle share it.
+
+        >>> ArithmeticHandler()._scan('what is 5 plus -2e1').numbers
+        [(2, 5.0), (4, -20.0)]
+        """
+        last_statement, scan = self._last_scan
+        if statement == last_statement:
+            return scan
+
+        numbers, infix, unary = [], [], []
+        infix_ops, unary_ops = ArithmeticHandler._INFIX, ArithmeticHandler._UNARY
+        for ix, token in enumerate(statement.split(' ')):
+            if is_number(token):
+                numbers.append((ix, float(token)))
+            elif token in infix_ops:
+                infix.append((ix, infix_ops[token]))
+            elif token in unary_ops:
+                unary.append((ix, unary_ops[token]))
+
+        scan = _Scan(numbers, infix, unary)
+        self._last_scan = (statement, scan)
+        return scan
+
     def _is_number_in(self, tokens):
         """Return true if there is a number available
 
         >>> ArithmeticHandler()._is_number_in('5 of them'.split(' '))
         True
         """
-        for token in tokens:
-            try:
-                return float(token) != None
-            except ValueError:
-                pass
-        return False
+        return any(is_number(token) for token in tokens)
 
     def _has_number_after(self, tokens, ix):
         """Check if number occurs after given index
@@ -67,12 +157,7 @@ class ArithmeticHandler(StatementHandlerBase):
         >>> ArithmeticHandler()._has_number_after("what is 7 log of?".split(), 3)
         False
         """
-        def try_parse_float(x):
-            try:
-                return float(x)
-            except ValueError:
-                return None
-        return any([try_parse_float(x) for x in tokens[ix:]])
+        return any(float(token) for token in tokens[ix:] if is_number(token))
 
     def _has_infix(self, statement):
         """Return true if it is able to handle infix operation
@@ -83,12 +168,11 @@ class ArithmeticHandler(StatementHandlerBase):
         >>> ArithmeticHandler()._has_infix("calculate + 2 please")
         False
         """
-        tokens = statement.split(' ')
-        for ix, token in enumerate(tokens):
-            for op, _ in ArithmeticHandler.INFIX_OPS:
-                if op == token:
-                    return self._is_number_in(tokens[ix:]) and self._is_number_in(tokens[:ix])
-        return False
+        scan = self._scan(statement)
+        if not scan.infix or not scan.numbers:
+            return False
+        op_ix = scan.infix[0][0]
+        return scan.numbers[0][0] < op_ix <= scan.numbers[-1][0]
 
     def _has_unary(self, statement):
         """Return true if unary statement can be handled
@@ -105,12 +189,10 @@ class ArithmeticHandler(StatementHandlerBase):
         >>> ArithmeticHandler()._has_unary('what is 12 of 5')
         False
         """
-        tokens = statement.split(' ')
-        for ix, token in enumerate(tokens):
-            for op, _ in ArithmeticHandler.UNARY_OPS:
-                if op == token:
-                    return self._is_number_in(tokens[ix:])
-        return False
+        scan = self._scan(statement)
+        if not scan.unary or not scan.numbers:
+            return False
+        return scan.unary[0][0] <= scan.numbers[-1][0]
 
     def _calc_unary(self, statement):
         """Return output of unary operation
@@ -124,26 +206,15 @@ class ArithmeticHandler(StatementHandlerBase):
         >>> ArithmeticHandler()._calc_unary('you know what square root of 64 is?')
         8.0
         """
-        tokens = statement.split(' ')
-        op_func = None
-        start_ix = 0
-        arg = None
-        for ix, token in enumerate(tokens):
-            for op_word, func in ArithmeticHandler.UNARY_OPS:
-                if op_word == token:
-                    op_func = func
-                    start_ix = ix
-        for token in tokens[start_ix:]:
-            try:
-                number = float(token)
-                arg = number
-                break
-            except ValueError:
-                pass
-
-        if op_func == None or arg == None:
+        scan = self._scan(statement)
+        if not scan.unary:
             raise RuntimeError("Unable to calculate unary operation: %s" % statement)
-        return op_func(arg)
+        start_ix, op_func = scan.unary[-1]
+        args = [number for ix, number in scan.numbers if ix >= start_ix]
+
+        if not args:
+            raise RuntimeError("Unable to calculate unary operation: %s" % statement)
+        return ArithmeticHandler.CACHE.call(op_func, args[0])
 
     def _calc_infix(self, statement):
         """Return output of infix operation
@@ -154,36 +225,16 @@ class ArithmeticHandler(StatementHandlerBase):
         >>> ArithmeticHandler()._calc_infix('tell me 20 minus 48')
         -28.0
         """
-        tokens = statement.split(' ')
-        op_func = None
-        start_ix = 0
-        arg_a = None
-        arg_b = None
-        for ix, token in enumerate(tokens):
-            for op_word, func in ArithmeticHandler.INFIX_OPS:
-                if op_word == token:
-                    op_func = func
-                    start_ix = ix
-
-        for token in tokens[start_ix:]:
-            try:
-                number = float(token)
-                arg_b = number
-                break
-            except ValueError:
-                pass
-
-        for token in tokens[:start_ix]:
-            try:
-                number = float(token)
-                arg_a = number
-                break
-            except ValueError:
-                pass
-
-        if op_func == None or arg_a == None or arg_b == None:
+        scan = self._scan(statement)
+        if not scan.infix:
             raise RuntimeError("Unable to calculate operation: %s" % statement)
-        return op_func(arg_a, arg_b)
+        start_ix, op_func = scan.infix[-1]
+        args_a = [number for ix, number in scan.numbers if ix < start_ix]
+        args_b = [number for ix, number in scan.numbers if ix >= start_ix]
+
+        if not args_a or not args_b:
+            raise RuntimeError("Unable to calculate operation: %s" % statement)
+        return ArithmeticHandler.CACHE.call(op_func, args_a[0], args_b[0])
 
     def can_handle(self, statement, memory=None):
         low = statement.lower()
@@ -204,11 +255,12 @@ class ArithmeticHandler(StatementHandlerBase):
         >>> ArithmeticHandler().handle("Calculate for me square root of 100").answer
         '10.0'
         """
-        if self._has_unary(statement):
-            num = self._calc_unary(statement)
+        low = statement.lower()
+        if self._has_unary(low):
+            num = self._calc_unary(low)
             return Response(str(num), [])
-        elif self._has_infix(statement):
-            num = self._calc_infix(statement)
+        elif self._has_infix(low):
+            num = self._calc_infix(low)
             return Response(str(num), [])
         raise RuntimeError("ArithmeticHandler reported ability to handle %s but can't" % statement)
 
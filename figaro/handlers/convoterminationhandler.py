@@ -20,6 +20,8 @@ from ..handlerbase import StatementHandlerBase
 
 class ConvoTerminationHandler(StatementHandlerBase):
     """Handle parting salutations such as 'bye'"""
+    PREFILTER = ('bye',)
+
     def can_handle(self, statement, memory):
         return self.handle(statement, memory) != None
 
@@ -21,6 +21,24 @@ from ..handlerbase import StatementHandlerBase
 
 class DeclarationHandler(StatementHandlerBase):
     """Handle declarative statements"""
+    PREFILTER = (' is ',)
+
+    @staticmethod
+    def memos(subject, value, statement=None):
+        """Return the memory entries for declaring that subject is value
+
+        statement is the full declaration, 'subject is value' by default.
+
+        >>> DeclarationHandler.memos('My name', 'Ishmael')
+        [('my name', 'Ishmael'), ('_interlocutor_name', 'Ishmael')]
+        """
+        if statement is None:
+            statement = subject + " is " + value
+        to_mem = [(subject.lower(), value)]
+        if "my name is" in statement.lower():
+            to_mem.append((MemoryKeys.key_interlocutor_name(), value))
+        return to_mem
+
     def can_handle(self, statement, memory=None):
         return self.handle(statement, memory) != None
 
@@ -32,15 +50,11 @@ class DeclarationHandler(StatementHandlerBase):
             return None
 
         key_val = statement.split(" is ")
-        key = key_val[0].lower()
-        val = key_val[1]
+        to_mem = DeclarationHandler.memos(key_val[0], key_val[1], statement)
 
         ans = "Thanks for letting me know."
-        to_mem = [(key, val)]
-
         if "my name is" in norm:
             ans = "Nice to meet you."
-            to_mem.append((MemoryKeys.key_interlocutor_name(), val))
 
         return Response(ans, to_mem)
 
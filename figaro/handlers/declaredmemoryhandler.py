@@ -21,6 +21,8 @@ from ..handlerbase import StatementHandlerBase
 
 class DeclaredMemoryHandler(StatementHandlerBase):
     """Handle statements that ask previously declared things"""
+    PREFILTER = (' is ', 'who am')
+
     def can_handle(self, statement, memory=None):
         return self.handle(statement, memory) != None
 
@@ -36,6 +36,8 @@ class ElizaStatementHandler(StatementHandlerBase):
                 ('are you', 'Yes. How about you?'),
                 ('you are', 'In what way exactly?')]
 
+    PREFILTER = tuple(set(pattern.split(' ')[0] for pattern, _ in PATTERNS))
+
     def _pattern_match(self, statement, pattern):
         """Match pattern to statement, or return (False, None)
 
@@ -20,6 +20,8 @@ from ..handlerbase import StatementHandlerBase
 
 class GreetingStatementHandler(StatementHandlerBase):
     """For Greetings"""
+    PREFILTER = ('hello', 'hey')
+
     def can_handle(self, statement, memory=None):
         lowr = statement.lower()
         if 'hello' in lowr:
@@ -0,0 +1,54 @@
+"""rulehandler.py -- Canned responses from compiled rule files
+
+   Copyright 2016 Rylan Santinon
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+from ..response import Response
+from ..memorykeys import MemoryKeys
+from ..handlerbase import StatementHandlerBase
+from ..rules import RuleSet
+
+class RuleHandler(StatementHandlerBase):
+    """Handle statements matched by a RuleSet
+
+    >>> rules = RuleSet([{'pattern': 'i like {topic}', 'answer': 'Me too.'}])
+    >>> RuleHandler(rules).handle('I like turtles', {})
+    <Response 'Me too.'>
+    """
+    def __init__(self, ruleset):
+        self._ruleset = ruleset
+        self.PREFILTER = ruleset.may_match
+
+    @classmethod
+    def from_file(cls, path, cache_path=None):
+        """Build a handler from a JSON rule file, see RuleSet.load"""
+        return cls(RuleSet.load(path, cache_path))
+
+    def can_handle(self, statement, memory=None):
+        return self.handle(statement, memory) != None
+
+    def handle(self, statement, memory=None):
+        found = self._ruleset.match(statement)
+        if found is None:
+            return None
+        answer, topic = found
+        mem = []
+        if topic != None:
+            mem.append((MemoryKeys.key_topic(), topic))
+        return Response(answer, mem)
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,178 @@
+"""memory.py -- shared base knowledge and per-session memory
+
+   Copyright 2016 Rylan Santinon
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+import io
+import os
+import json
+from copy import deepcopy
+
+try:
+    from collections.abc import Mapping
+except ImportError: # Python 2
+    from collections import Mapping
+
+class KnowledgeBase(Mapping):
+    """Read-only facts shared by every Figaro in the process
+
+    Keys are lowercased the same way DeclarationHandler lowercases the
+    subject of a declaration.
+
+    >>> kb = KnowledgeBase({'Alabama': 'in America.'})
+    >>> kb.get('alabama')
+    'in America.'
+    >>> 'texas' in kb
+    False
+    """
+    _loaded = {}
+
+    def __init__(self, facts=None):
+        self._facts = {}
+        for key, val in (facts or {}).items():
+            self._facts[key.lower()] = val
+
+    @classmethod
+    def load(cls, path):
+        """Return the knowledge base in the JSON file at path, loading it once per process"""
+        path = os.path.abspath(path)
+        base = cls._loaded.get(path)
+        if base is None:
+            with io.open(path, 'r', encoding='utf-8') as data_fp:
+                base = cls._loaded[path] = cls(json.load(data_fp))
+        return base
+
+    def get(self, key, default=None):
+        return self._facts.get(key, default)
+
+    def __getitem__(self, key):
+        return self._facts[key]
+
+    def __contains__(self, key):
+        return key in self._facts
+
+    def __iter__(self):
+        return iter(self._facts)
+
+    def __len__(self):
+        return len(self._facts)
+
+EMPTY_KNOWLEDGE = KnowledgeBase()
+
+class LayeredMemory(Mapping):
+    """Session memory: a private overlay in front of a shared KnowledgeBase
+
+    Writes go to the overlay; lookups check the overlay, then facts
+    learned in bulk, then the base. Iteration, len(), keys() and items()
+    cover the keys of all three layers. Copies copy the overlay and share
+    the rest, so bulk facts never pass through deepcopy.
+
+    >>> kb = KnowledgeBase({'alabama': 'in America.'})
+    >>> mem = LayeredMemory(kb)
+    >>> mem['alabama']
+    'in America.'
+    >>> mem['alabama'] = 'a state.'
+    >>> mem.get('alabama'), kb.get('alabama')
+    ('a state.', 'in America.')
+    >>> mem.update([('alabama', 'in the south.')])
+    >>> mem['alabama']
+    'in the south.'
+    >>> mem['texas'] = 'big.'
+    >>> sorted(mem.items())
+    [('alabama', 'in the south.'), ('texas', 'big.')]
+    >>> snapshot = deepcopy(mem)
+    >>> snapshot.base is kb
+    True
+    >>> snapshot.update([('alabama', 'elsewhere.')])
+    >>> mem['alabama']
+    'in the south.'
+    """
+    def __init__(self, base=None, overlay=None, learned=None):
+        self._base = EMPTY_KNOWLEDGE if base is None else base
+        self._overlay = {} if overlay is None else overlay
+        self._learned = {} if learned is None else learned
+        self._learned_shared = learned is not None
+
+    @property
+    def base(self):
+        """The shared, read-only knowledge base"""
+        return self._base
+
+    @property
+    def overlay(self):
+        """The facts memorized one at a time during this session"""
+        return self._overlay
+
+    def get(self, key, default=None):
+        if key in self._overlay:
+            return self._overlay[key]
+        if key in self._learned:
+            return self._learned[key]
+        return self._base.get(key, default)
+
+    def __getitem__(self, key):
+        if key in self._overlay:
+            return self._overlay[key]
+        if key in self._learned:
+            return self._learned[key]
+        return self._base[key]
+
+    def __setitem__(self, key, val):
+        self._overlay[key] = val
+
+    def __contains__(self, key):
+        return key in self._overlay or key in self._learned or key in self._base
+
+    def __iter__(self):
+        overlay, learned = self._overlay, self._learned
+        for key in overlay:
+            yield key
+        for key in learned:
+            if key not in overlay:
+                yield key
+        for key in self._base:
+            if key not in overlay and key not in learned:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def update(self, entries):
+        """Learn many (key, val) entries at once, replacing earlier values
+
+        A copy gets its own learned facts on its first update, so updating
+        a handler's snapshot never changes the session it was copied from.
+        """
+        if self._learned_shared:
+            self._learned = dict(self._learned)
+            self._learned_shared = False
+        if not self._overlay:
+            self._learned.update(entries)
+            return
+        for key, val in entries:
+            self._overlay.pop(key, None)
+            self._learned[key] = val
+
+    def copy(self):
+        """Return a copy with its own overlay and learned facts"""
+        return LayeredMemory(self._base, dict(self._overlay), self._learned)
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return LayeredMemory(self._base, deepcopy(self._overlay, memo), self._learned)
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,156 @@
+"""opcache.py -- bounded memo tables for arithmetic operators
+
+   Copyright 2016 Rylan Santinon
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+import threading
+
+class ClockCache(object):
+    """Bounded mapping with CLOCK (second chance) eviction
+
+    >>> cc = ClockCache(2)
+    >>> cc.put('a', 1)
+    >>> cc.put('b', 2)
+    >>> cc.get('a')
+    1
+    >>> cc.put('c', 3)
+    'b'
+    >>> cc.get('b') is None
+    True
+    >>> len(cc)
+    2
+    """
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("ClockCache capacity must be positive: %s" % capacity)
+        self._capacity = capacity
+        self._index = {}
+        self._keys = []
+        self._values = []
+        self._ref = []
+        self._hand = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, key, default=None):
+        """Return the cached value for key and mark it recently used"""
+        slot = self._index.get(key)
+        if slot is None:
+            return default
+        self._ref[slot] = True
+        return self._values[slot]
+
+    def put(self, key, value):
+        """Store value under key, returning the evicted key if any"""
+        slot = self._index.get(key)
+        if slot is not None:
+            self._values[slot] = value
+            self._ref[slot] = True
+            return None
+        if len(self._keys) < self._capacity:
+            self._index[key] = len(self._keys)
+            self._keys.append(key)
+            self._values.append(value)
+            self._ref.append(False)
+            return None
+
+        while self._ref[self._hand]:
+            self._ref[self._hand] = False
+            self._hand = (self._hand + 1) % self._capacity
+        slot = self._hand
+        evicted = self._keys[slot]
+        del self._index[evicted]
+        self._index[key] = slot
+        self._keys[slot] = key
+        self._values[slot] = value
+        self._hand = (slot + 1) % self._capacity
+        return evicted
+
+class OperatorCache(object):
+    """Memoize results of numeric operators, one ClockCache per operator
+
+    Operands are keyed by their exact float representation so that nan,
+    inf and -0.0 each get a stable key of their own. Calls that raise
+    (domain errors, division by zero) are never cached. Tables are
+    guarded by a lock, so one cache may be shared between threads.
+
+    A lookup costs a few microseconds, more than sqrt or an addition, so caching
+    only pays for operators slower than that; see benchmarks/opcache.py.
+
+    >>> from math import sqrt
+    >>> oc = OperatorCache(capacity=8, enabled=True)
+    >>> oc.call(sqrt, 16.0)
+    4.0
+    >>> oc.call(sqrt, 16.0)
+    4.0
+    >>> oc.call(sqrt, float('nan')) != oc.call(sqrt, float('nan'))
+    True
+    >>> sorted(oc.stats().items())
+    [('evictions', 0), ('hits', 2), ('misses', 2), ('size', 2)]
+    >>> oc.call(sqrt, -1.0)
+    Traceback (most recent call last):
+     ...
+    ValueError: math domain error
+    """
+    def __init__(self, capacity=1024, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._capacity = capacity
+        self._tables = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def call(self, func, *args):
+        """Return func(*args), consulting the memo table for func first"""
+        if not self.enabled:
+            return func(*args)
+
+        key = tuple(float(arg).hex() for arg in args)
+        with self._lock:
+            table = self._tables.get(func)
+            if table is None:
+                table = self._tables[func] = ClockCache(self._capacity)
+            result = table.get(key, self)
+            if result is not self:
+                self._hits += 1
+                return result
+            self._misses += 1
+
+        result = func(*args)
+        with self._lock:
+            if table.put(key, result) is not None:
+                self._evictions += 1
+        return result
+
+    def stats(self):
+        """Return hit, miss and eviction counts and the number of cached results"""
+        with self._lock:
+            return {'hits': self._hits,
+                    'misses': self._misses,
+                    'evictions': self._evictions,
+                    'size': sum(len(table) for table in self._tables.values())}
+
+    def clear(self):
+        """Drop all cached results and reset the counters"""
+        with self._lock:
+            self._tables = {}
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
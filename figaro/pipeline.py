@@ -0,0 +1,117 @@
+"""pipeline.py -- streaming stages between a statement and its answer
+
+   Copyright 2016 Rylan Santinon
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+   A stage is a callable stage(figaro, turns) returning an iterator of
+   turns, normally a generator. Stages are chained lazily, so each turn
+   is committed to memory before the next one is routed, as long as no
+   stage holds turns back.
+"""
+
+class Turn(object):
+    """One statement as it moves through the pipeline"""
+    def __init__(self, statement, deadline=None):
+        self.statement = statement
+        self.deadline = deadline
+        self.handler = None
+        self.memory = None
+        self.response = None
+        self.answer = None
+
+    def __repr__(self):
+        return "<Turn '%s'>" % self.statement
+
+def normalize(figaro, statements):
+    """Wrap raw statements in Turns and start their deadlines
+
+    Handlers do their own case folding, so the statement is kept as is
+    apart from being cut to figaro.max_input_length.
+    """
+    profiler = figaro.profiler
+    max_length = figaro.max_input_length
+    for statement in statements:
+        profiler.begin_turn(statement)
+        with profiler.span('normalize'):
+            if max_length is not None:
+                statement = statement[:max_length]
+            turn = Turn(statement, figaro._deadline())
+        yield turn
+
+def route(figaro, turns):
+    """Pick the handler for each turn along with its copy of memory"""
+    profiler = figaro.profiler
+    for turn in turns:
+        with profiler.span('route'):
+            turn.handler, turn.memory = figaro._route(turn.statement, turn.deadline)
+        yield turn
+
+def handle(figaro, turns):
+    """Ask the chosen handler for a response"""
+    profiler = figaro.profiler
+    for turn in turns:
+        with profiler.span(turn.handler.__class__.__name__ + '.handle'):
+            turn.response = turn.handler.handle(turn.statement, turn.memory)
+        turn.answer = turn.response.answer
+        yield turn
+
+def commit(figaro, turns):
+    """Store the response memos and note the end of conversation"""
+    profiler = figaro.profiler
+    for turn in turns:
+        with profiler.span('commit'):
+            figaro._commit(turn.response)
+        profiler.end_turn()
+        yield turn
+
+def per_turn(func):
+    """Make a stage that calls func(turn) on every turn
+
+    >>> def shout(turn):
+    ...     turn.statement = turn.statement.upper()
+    >>> from figaro import Figaro
+    >>> [t.statement for t in run(Figaro(), ['hi'], [normalize, per_turn(shout)])]
+    ['HI']
+    """
+    def stage(figaro, turns):
+        for turn in turns:
+            func(turn)
+            yield turn
+    stage.__name__ = getattr(func, '__name__', 'per_turn')
+    return stage
+
+def fuse(*stages):
+    """Combine several stages into one
+
+    >>> from figaro import Figaro
+    >>> stage = fuse(normalize, per_turn(lambda turn: None))
+    >>> list(stage(Figaro(), ['a', 'b']))
+    [<Turn 'a'>, <Turn 'b'>]
+    """
+    def stage(figaro, turns):
+        return run(figaro, turns, stages)
+    return stage
+
+DEFAULT_STAGES = (normalize, route, handle, commit)
+
+def run(figaro, statements, stages=DEFAULT_STAGES):
+    """Chain stages over statements and return the resulting turns iterator"""
+    turns = statements
+    for stage in stages:
+        turns = stage(figaro, turns)
+    return turns
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,138 @@
+"""prefilter.py -- cheap keyword prefilter for selecting candidate handlers
+
+   Copyright 2016 Rylan Santinon
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+from array import array
+from collections import deque
+
+class KeywordAutomaton(object):
+    """Aho-Corasick automaton mapping keywords to bitsets
+
+    Any values supporting | may be used instead of int bitsets, given
+    the matching empty value, e.g. KeywordAutomaton(frozenset()).
+
+    >>> ka = KeywordAutomaton()
+    >>> ka.add('he', 1)
+    >>> ka.add('she', 2)
+    >>> ka.add('hers', 4)
+    >>> ka.compile()
+    >>> ka.scan('ushers')
+    7
+    >>> ka.scan('his')
+    0
+    """
+    _SHIFT = 21
+
+    def __init__(self, empty=0):
+        self._empty = empty
+        self._goto = {}
+        self._fail = array('l', [0])
+        self._out = {}
+
+    def add(self, keyword, mask):
+        """Report mask whenever keyword occurs in scanned text"""
+        state = 0
+        for char in keyword:
+            edge = state << self._SHIFT | ord(char)
+            nxt = self._goto.get(edge)
+            if nxt is None:
+                nxt = self._goto[edge] = len(self._fail)
+                self._fail.append(0)
+            state = nxt
+        self._out[state] = self._out.get(state, self._empty) | mask
+
+    def compile(self):
+        """Compute failure links; must be called after the last add"""
+        goto, fail, out, shift = self._goto, self._fail, self._out, self._SHIFT
+        children = {}
+        for edge, nxt in goto.items():
+            children.setdefault(edge >> shift, []).append((edge & ((1 << shift) - 1), nxt))
+
+        queue = deque(nxt for _, nxt in children.get(0, ()))
+        while queue:
+            state = queue.popleft()
+            for code, nxt in children.get(state, ()):
+                queue.append(nxt)
+                link = fail[state]
+                while link and (link << shift | code) not in goto:
+                    link = fail[link]
+                fallback = goto.get(link << shift | code, 0)
+                fail[nxt] = fallback if fallback != nxt else 0
+                if fail[nxt] in out:
+                    out[nxt] = out.get(nxt, self._empty) | out[fail[nxt]]
+
+    def scan(self, text):
+        """Return the union of masks of all keywords found in text"""
+        goto, fail, out, shift = self._goto, self._fail, self._out, self._SHIFT
+        state = 0
+        found = self._empty
+        for char in text:
+            code = ord(char)
+            nxt = goto.get(state << shift | code)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto.get(state << shift | code)
+            state = nxt or 0
+            if state in out:
+                found |= out[state]
+        return found
+
+class HandlerPrefilter(object):
+    """Select candidate handlers from their PREFILTER keywords
+
+    Handlers without a PREFILTER are always candidates. A PREFILTER may
+    also be a callable taking the lowercased statement, for handlers that
+    keep their own precompiled index. Bit i of the returned bitset
+    corresponds to handlers[i].
+
+    >>> from .handlers.greetingstatementhandler import GreetingStatementHandler
+    >>> from .handlerbase import DefaultStatementHandler
+    >>> pf = HandlerPrefilter([GreetingStatementHandler(), DefaultStatementHandler()])
+    >>> pf.candidates('Hello there')
+    3
+    >>> pf.candidates('what time is it')
+    2
+    """
+    def __init__(self, handlers):
+        self._automaton = KeywordAutomaton()
+        self._always = 0
+        self._tests = []
+        for ix, handler in enumerate(handlers):
+            bit = 1 << ix
+            keywords = handler.PREFILTER
+            if keywords is None:
+                self._always |= bit
+                continue
+            if callable(keywords):
+                self._tests.append((bit, keywords))
+                continue
+            for keyword in keywords:
+                if not keyword:
+                    self._always |= bit
+                self._automaton.add(keyword.lower(), bit)
+        self._automaton.compile()
+
+    def candidates(self, statement):
+        """Return bitset of handlers that may be able to handle statement"""
+        norm = statement.lower()
+        found = self._always | self._automaton.scan(norm)
+        for bit, test in self._tests:
+            if test(norm):
+                found |= bit
+        return found
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
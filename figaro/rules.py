@@ -0,0 +1,188 @@
+"""rules.py -- canned responses compiled from JSON rule files
+
+   Copyright 2016 Rylan Santinon
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+   A rule file is a JSON object with a list of rules, tried in order:
+
+       {"name": "Smalltalk",
+        "rules": [{"pattern": "how are {topic} *", "answer": "Fine."},
+                  {"keyword": "thank", "answer": "You're welcome."}]}
+
+   A "pattern" is matched word by word from the start of the statement,
+   like ElizaStatementHandler.PATTERNS, where '*' matches any word and
+   '{topic}' remembers the word as the conversation topic. A "keyword"
+   matches anywhere in the lowercased statement.
+"""
+import io
+import os
+import gc
+import json
+import pickle
+
+from .prefilter import KeywordAutomaton
+
+FORMAT_VERSION = 2
+
+# os.rename does not overwrite on Windows; os.replace needs Python 3.3.
+_replace = getattr(os, 'replace', os.rename)
+
+WILDCARDS = ('*', '{topic}')
+
+def _match_words(words, pattern_words):
+    """Match pattern words against statement words, or return (False, None)
+
+    >>> _match_words('my dog ate it'.split(' '), ['my', '{topic}', '*'])
+    (True, 'dog')
+    """
+    topic = None
+    for input_word, pattern_word in zip(words, pattern_words):
+        if pattern_word == '*':
+            pass
+        elif pattern_word == '{topic}':
+            topic = input_word
+        elif pattern_word != input_word:
+            return (False, None)
+    return (True, topic)
+
+class RuleSet(object):
+    """Rules indexed for matching: patterns by first word, keywords by automaton
+
+    >>> rs = RuleSet([{'pattern': 'are you', 'answer': 'Yes.'},
+    ...               {'keyword': 'hello', 'answer': 'Hello!'},
+    ...               {'pattern': '* {topic} is', 'answer': 'Is it?'}])
+    >>> rs.match('Hello, are you there?')
+    ('Hello!', None)
+    >>> rs.match('are you there?')
+    ('Yes.', None)
+    >>> rs.match('the sky is blue')
+    ('Is it?', 'sky')
+    >>> rs.match('what a nice day') is None
+    True
+    """
+    def __init__(self, rules, name=None):
+        self.name = name
+        self._answers = []
+        self._patterns = []
+        self._by_first_word = {}
+        self._wild_patterns = []
+        self._keywords = KeywordAutomaton(frozenset())
+
+        for ix, rule in enumerate(rules):
+            answer = rule.get('answer')
+            if not answer:
+                raise ValueError("Rule %d has no answer: %r" % (ix, rule))
+            self._answers.append(answer)
+            self._patterns.append(None)
+
+            if 'pattern' in rule:
+                pattern = self._patterns[ix] = rule['pattern'].lower()
+                first_word = pattern.split(' ', 1)[0]
+                if first_word in WILDCARDS:
+                    self._wild_patterns.append(ix)
+                else:
+                    self._by_first_word.setdefault(first_word, []).append(ix)
+            elif rule.get('keyword'):
+                keyword = rule['keyword'].lower()
+                self._keywords.add(keyword, frozenset([ix]))
+            else:
+                raise ValueError("Rule %d needs a pattern or keyword: %r" % (ix, rule))
+        self._keywords.compile()
+
+    def __len__(self):
+        return len(self._answers)
+
+    def may_match(self, norm):
+        """Cheap check on a lowercased statement; False means no rule matches"""
+        if self._wild_patterns or norm.split(' ', 1)[0] in self._by_first_word:
+            return True
+        return bool(self._keywords.scan(norm))
+
+    def _first_pattern(self, candidates, words, limit):
+        for ix in candidates:
+            if ix >= limit:
+                break
+            match, topic = _match_words(words, self._patterns[ix].split(' '))
+            if match:
+                return ix, topic
+        return limit, None
+
+    def match(self, statement):
+        """Return (answer, topic) from the first rule matching statement, or None"""
+        norm = statement.lower()
+        words = norm.split(' ')
+
+        keyword_hits = self._keywords.scan(norm)
+        best = min(keyword_hits) if keyword_hits else len(self._answers)
+        topic = None
+
+        candidates = self._by_first_word.get(words[0], ())
+        best, topic = self._first_pattern(candidates, words, best)
+        ix, wild_topic = self._first_pattern(self._wild_patterns, words, best)
+        if ix < best:
+            best, topic = ix, wild_topic
+
+        if best == len(self._answers):
+            return None
+        return self._answers[best], topic
+
+    @classmethod
+    def load(cls, path, cache_path=None):
+        """Return the rule set in the JSON file at path
+
+        The compiled rule set is pickled to cache_path (default: path +
+        '.compiled') and reused while it was compiled from the same path
+        and the rule file keeps the same size and modification time. Only
+        point cache_path at trusted files.
+        """
+        if cache_path is None:
+            cache_path = path + '.compiled'
+        source = os.stat(path)
+        stamp = (FORMAT_VERSION, os.path.abspath(path), source.st_size, source.st_mtime)
+
+        # Unpickling allocates many small objects and none of them are
+        # garbage, so collecting during the load is wasted time.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(cache_path, 'rb') as cache_fp:
+                if pickle.load(cache_fp) == stamp:
+                    return pickle.load(cache_fp)
+        except Exception:
+            pass
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        with io.open(path, 'r', encoding='utf-8') as rules_fp:
+            data = json.load(rules_fp)
+        ruleset = cls(data['rules'], data.get('name'))
+
+        tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        try:
+            with open(tmp_path, 'wb') as cache_fp:
+                pickle.dump(stamp, cache_fp, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(ruleset, cache_fp, pickle.HIGHEST_PROTOCOL)
+            _replace(tmp_path, cache_path)
+        except (IOError, OSError):
+            # An unwritable cache only costs the next start a recompile.
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return ruleset
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,5 +1,22 @@
+import os
+import io
+import json
+import time
+import shutil
+import tempfile
+from contextlib import contextmanager
+
 from figaro import Figaro
 
+@contextmanager
+def _temp_dir():
+    """Yield a new temporary directory, removing it afterwards"""
+    path = tempfile.mkdtemp()
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path)
+
 def test_default_handler():
     expected = "I'm not sure how to respond to that."
     assert Figaro().hears("abcd") == expected
@@ -51,3 +68,296 @@ def test_conv_termination():
     assert fg.conversation_ended == False
     assert fg.hears("Bye") == "See you later!"
     assert fg.conversation_ended == True
+
+STATEMENTS = ["Hello there", "hey", "they are late", "5 minus 13", "whats root 16",
+              "what is sqrt inf", "jibberjabber", "Why are you so rude?",
+              "alabama is in America.", "Where is alabama?", "who am I?",
+              "My name is Ishmael", "Goodbye", "you are really annoying", ""]
+
+def test_prefilter_matches_unfiltered_dispatch():
+    for statement in STATEMENTS:
+        assert Figaro().hears(statement) == Figaro(use_prefilter=False).hears(statement)
+
+def test_prefilter_keeps_every_accepting_handler():
+    from figaro.prefilter import HandlerPrefilter
+    handlers = Figaro()._handlers
+    prefilter = HandlerPrefilter(handlers)
+    for statement in STATEMENTS:
+        candidates = prefilter.candidates(statement)
+        for ix, handler in enumerate(handlers):
+            if handler.can_handle(statement, {}):
+                assert candidates >> ix & 1, (handler, statement)
+
+def test_register_handler_with_prefilter():
+    from figaro.handlerbase import StatementHandlerBase
+    from figaro.response import Response
+
+    class WeatherHandler(StatementHandlerBase):
+        PREFILTER = ('weather',)
+        def can_handle(self, statement, memory=None):
+            return 'weather' in statement.lower()
+        def handle(self, statement, memory=None):
+            return Response('Sunny.', [])
+
+    fg = Figaro()
+    fg.register_handler(WeatherHandler())
+    assert fg.hears("Weather report please") == 'Sunny.'
+    assert fg.hears("abcd") == "I'm not sure how to respond to that."
+
+def test_math_cache_keeps_domain_errors():
+    from figaro import ArithmeticHandler
+    ArithmeticHandler.CACHE.enabled = True
+    try:
+        for statement in ["what is root -1", "log 0", "what is 3 / 0"]:
+            for _ in range(2):
+                try:
+                    Figaro().hears(statement)
+                    assert False, statement
+                except (ValueError, ZeroDivisionError):
+                    pass
+        assert Figaro().hears("what is 6 times 7") == "42.0"
+        assert Figaro().hears("what is 6 times 7") == "42.0"
+        assert ArithmeticHandler.CACHE.stats()['hits'] >= 1
+    finally:
+        ArithmeticHandler.CACHE.enabled = False
+        ArithmeticHandler.CACHE.clear()
+
+def test_math_cache_disabled_by_default():
+    from figaro import ArithmeticHandler
+    before = ArithmeticHandler.CACHE.stats()
+    assert Figaro().hears("what is 6 times 7") == "42.0"
+    assert ArithmeticHandler.CACHE.stats() == before
+
+def test_knowledge_base_shared_read_only():
+    from figaro import KnowledgeBase
+    with _temp_dir() as data_dir:
+        path = os.path.join(data_dir, 'facts.json')
+        with open(path, 'w') as data_fp:
+            json.dump({'Alabama': 'in America.'}, data_fp)
+        kb = KnowledgeBase.load(path)
+        assert KnowledgeBase.load(path) is kb
+
+    fg = Figaro(knowledge=kb)
+    assert fg.hears("Where is alabama?") == 'in America.'
+    fg.hears("alabama is a state.")
+    assert fg.hears("Where is alabama?") == 'a state.'
+    assert Figaro(knowledge=kb).hears("Where is alabama?") == 'in America.'
+    assert kb.get('alabama') == 'in America.'
+
+def test_handler_memory_is_a_mapping():
+    from figaro import KnowledgeBase
+    from figaro.handlerbase import StatementHandlerBase
+    from figaro.response import Response
+
+    class RecallHandler(StatementHandlerBase):
+        PREFILTER = ('recall',)
+        def can_handle(self, statement, memory=None):
+            return statement == 'recall'
+        def handle(self, statement, memory=None):
+            assert sorted(memory) == sorted(memory.keys())
+            facts = ', '.join('%s=%s' % item for item in sorted(memory.items()))
+            return Response('%d: %s' % (len(memory), facts), [])
+
+    fg = Figaro(knowledge=KnowledgeBase({'Alabama': 'in America.'}))
+    fg.register_handler(RecallHandler())
+    fg.learn([('texas', 'big.')])
+    fg.hears("ohio is flat.")
+    fg.hears("texas is huge.")
+    assert fg.hears("recall") == '3: alabama=in America., ohio=flat., texas=huge.'
+
+def test_pipeline_commits_each_turn_before_the_next():
+    fg = Figaro()
+    answers = [t.answer for t in fg.converse(["My name is Ada", "who am I?", "bye"])]
+    assert answers == ["Nice to meet you.", "You told me your name is Ada.", "See you later!"]
+    assert fg.conversation_ended == True
+
+def test_pipeline_post_process_applies_to_hears():
+    from figaro import pipeline
+    def redact(turn):
+        turn.answer = turn.answer.replace('Ada', '***')
+    fg = Figaro()
+    fg.stages.insert(fg.stages.index(pipeline.commit), pipeline.per_turn(redact))
+    fg.hears("My name is Ada")
+    assert fg.hears("who am I?") == "You told me your name is ***."
+
+def test_math_handler_upper_case_operator():
+    assert Figaro().hears("SQRT 16") == "4.0"
+
+def test_math_handler_numbers_agree_with_float():
+    # On Python 2 the plain literals are byte strings and the u'' ones unicode.
+    for number in ['5\xa0', '5\x85', '5\x1c', '1_0',
+                   u'5\xa0', u'5\x85', u'5\x1c', u'5\u3000', u'1_0']:
+        try:
+            expected = str(float(number) + 2)
+        except ValueError:
+            expected = "I'm not sure how to respond to that."
+        assert Figaro().hears(number + ' plus 2') == expected, repr(number)
+
+def test_profiler_traces_every_turn_stage():
+    from figaro import TurnProfiler
+    prof = TurnProfiler()
+    fg = Figaro(profiler=prof)
+    fg.hears("My name is Ada")
+    stacks = [line.rsplit(' ', 1)[0] for line in prof.collapsed().splitlines()]
+    for stack in ['turn;normalize', 'turn;route;prefilter', 'turn;route;snapshot',
+                  'turn;route;DeclarationHandler.can_handle',
+                  'turn;DeclarationHandler.handle', 'turn;commit']:
+        assert stack in stacks, stack
+
+    with _temp_dir() as trace_dir:
+        path = os.path.join(trace_dir, 'trace.json')
+        prof.write(path, 'chrome')
+        with open(path) as trace_fp:
+            events = json.load(trace_fp)['traceEvents']
+    assert [e for e in events if e['name'] == 'turn'][0]['args'] == {'statement': 'My name is Ada'}
+
+def test_profiler_sample_rate_zero_records_nothing():
+    from figaro import TurnProfiler
+    prof = TurnProfiler(sample_rate=0.0)
+    Figaro(profiler=prof).hears("hello")
+    assert prof.collapsed() == ''
+
+def _write_eliza_rules(path):
+    from figaro import ElizaStatementHandler
+    rules = [{'pattern': pattern, 'answer': answer}
+             for pattern, answer in ElizaStatementHandler.PATTERNS]
+    rules.append({'keyword': 'thank', 'answer': "You're welcome."})
+    with open(path, 'w') as rules_fp:
+        json.dump({'name': 'eliza', 'rules': rules}, rules_fp)
+
+def test_rule_file_compiled_and_cached():
+    from figaro import RuleHandler, ElizaStatementHandler
+    from figaro.rules import RuleSet
+    with _temp_dir() as rules_dir:
+        path = os.path.join(rules_dir, 'eliza.json')
+        _write_eliza_rules(path)
+
+        ruleset = RuleSet.load(path)
+        assert os.path.exists(path + '.compiled')
+        assert RuleSet.load(path).name == 'eliza'
+
+        eliza, handler = ElizaStatementHandler(), RuleHandler(ruleset)
+        for statement in STATEMENTS + ["My dog ate it", "what is a rhino?", "never again"]:
+            expected = eliza.handle(statement, {})
+            actual = handler.handle(statement, {})
+            assert repr(expected) == repr(actual), statement
+            if expected:
+                assert expected.memo == actual.memo
+            assert handler.PREFILTER(statement.lower()) or not expected, statement
+
+        fg = Figaro()
+        fg.register_handler(RuleHandler.from_file(path))
+        assert fg.hears("thanks a lot") == "You're welcome."
+
+def test_rule_file_loads_when_cache_unwritable():
+    from figaro.rules import RuleSet
+    with _temp_dir() as rules_dir:
+        path = os.path.join(rules_dir, 'eliza.json')
+        _write_eliza_rules(path)
+        cache_path = os.path.join(rules_dir, 'missing', 'eliza.compiled')
+        assert RuleSet.load(path, cache_path).match('never again') == ('Not even once?', None)
+        assert os.listdir(rules_dir) == ['eliza.json']
+
+def test_rule_cache_keyed_by_rule_file():
+    from figaro.rules import RuleSet
+    with _temp_dir() as rules_dir:
+        cache_path = os.path.join(rules_dir, 'shared.compiled')
+        for name in ['a', 'b']:
+            path = os.path.join(rules_dir, name + '.json')
+            with open(path, 'w') as rules_fp:
+                json.dump({'rules': [{'keyword': name, 'answer': name.upper()}]}, rules_fp)
+            os.utime(path, (1000000000, 1000000000))
+        for name in ['a', 'b', 'a']:
+            ruleset = RuleSet.load(os.path.join(rules_dir, name + '.json'), cache_path)
+            assert ruleset.match(name) == (name.upper(), None), name
+
+def _slow_handler(accepts):
+    from figaro.handlerbase import StatementHandlerBase
+    from figaro.response import Response
+
+    class SlowHandler(StatementHandlerBase):
+        PREFILTER = ('slow',)
+        def can_handle(self, statement, memory=None):
+            time.sleep(0.02)
+            return accepts
+        def handle(self, statement, memory=None):
+            return Response('Slow but sure.', [])
+    return SlowHandler()
+
+def test_turn_budget_keeps_slow_handler_that_accepts():
+    fg = Figaro(turn_budget=0.01)
+    fg.register_handler(_slow_handler(True))
+    assert fg.hears("slow down") == "Slow but sure."
+    assert fg.deadlines_exceeded == {}
+
+def test_turn_budget_falls_back_before_next_handler():
+    fg = Figaro(turn_budget=0.01)
+    fg.register_handler(_slow_handler(False))
+    fg.register_handler(_slow_handler(True))
+    assert fg.hears("hey") == "Hey there."
+    assert fg.hears("slow down") == "I'm not sure how to respond to that."
+    assert fg.deadlines_exceeded == {'SlowHandler': 1}
+
+def test_turn_budget_does_not_count_fallback():
+    fg = Figaro(turn_budget=0)
+    assert fg.hears("jibber") == "I'm not sure how to respond to that."
+    assert fg.deadlines_exceeded == {}
+
+def test_turn_budget_within_budget_keeps_declarations():
+    fg = Figaro(turn_budget=1.0)
+    assert fg.hears("alabama is in America") == "Thanks for letting me know."
+    assert fg.hears("Where is alabama?") == "in America"
+    assert fg.deadlines_exceeded == {}
+
+def test_max_input_length_caps_statement():
+    fg = Figaro(max_input_length=5)
+    assert fg.hears("hey " + "x" * 100000) == "Hey there."
+    assert [t.statement for t in fg.converse(["0123456789"])] == ["01234"]
+
+def test_learn_file_csv_and_jsonl():
+    with _temp_dir() as facts_dir:
+        csv_path = os.path.join(facts_dir, 'facts.csv')
+        with io.open(csv_path, 'w', encoding='utf-8') as facts_fp:
+            facts_fp.write(u'subject,value\nAlabama,"in America, mostly."\nmy name,Ada\n'
+                           u'Z\u00fcrich,in Switzerland\n')
+        jsonl_path = os.path.join(facts_dir, 'facts.jsonl')
+        with open(jsonl_path, 'w') as facts_fp:
+            facts_fp.write(json.dumps({'subject': 'Rodney', 'value': 'a friend'}) + '\n')
+
+        fg = Figaro()
+        fg.hears("alabama is a state.")
+        fg.learn_file(csv_path)
+        fg.learn_file(jsonl_path)
+        assert fg.hears("Where is alabama?") == 'in America, mostly.'
+        assert fg.hears("who am I?") == 'You told me your name is Ada.'
+        assert fg.hears("who is rodney?") == 'a friend'
+        assert fg.hears(u"where is z\u00fcrich?") == u'in Switzerland'
+        assert fg.hears("where is subject?") != 'value'
+        fg.hears("rodney is a foe")
+        assert fg.hears("who is rodney?") == 'a foe'
+
+def test_learn_file_rejects_malformed_facts():
+    from figaro.facts import read_facts
+    with _temp_dir() as facts_dir:
+        for name, content, where in [('short.csv', 'alabama,a state\ntexas\n', 'short.csv:2'),
+                                     ('wide.csv', 'a,b,c\n', 'wide.csv:1'),
+                                     ('facts.jsonl', '{"subject": "x"}\n', 'facts.jsonl:1'),
+                                     ('pi.jsonl', '{"subject": "a", "value": "b"}\n'
+                                      '{"subject": "pi", "value": 3.14}\n', 'pi.jsonl:2')]:
+            path = os.path.join(facts_dir, name)
+            with open(path, 'w') as facts_fp:
+                facts_fp.write(content)
+            try:
+                list(read_facts(path))
+                assert False, name
+            except ValueError as err:
+                assert where in str(err), err
+
+            fg = Figaro()
+            try:
+                fg.learn_file(path)
+                assert False, name
+            except ValueError:
+                pass
+            assert fg.hears("where is alabama?") == "I'm not sure how to respond to that."
+            assert fg.hears("what is a?") == "I'm not sure how to respond to that."